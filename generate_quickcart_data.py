@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-QuickCart synthetic data generator (no external deps).
+QuickCart synthetic data generator (no external deps; uses orjson if installed).
 
 Outputs:
 - raw_data.jsonl               (nested transaction logs)
@@ -17,12 +17,34 @@ Designed to include:
 """
 
 import argparse
-import json
 import os
 import random
 import string
 from datetime import datetime, timedelta, UTC
-from uuid import uuid4
+
+# JSON serializer returning UTF-8 bytes: orjson when installed, stdlib otherwise
+try:
+    from orjson import dumps as json_dumps_bytes
+except ImportError:
+    from json import dumps as _json_dumps
+
+    def json_dumps_bytes(obj) -> bytes:
+        return _json_dumps(obj).encode("utf-8")
+
+# ----------------------------- distributions -----------------------------
+# (values, weights) for categories drawn once per row; generate() samples each
+# in bulk with random.choices instead of one weighted draw per row.
+
+ATTEMPT_VALUES, ATTEMPT_WEIGHTS = (1, 2, 3, 4), (0.72, 0.20, 0.06, 0.02)
+PAYMENT_STATUS_VALUES, PAYMENT_STATUS_WEIGHTS = ("FAILED", "PENDING", "SUCCESS"), (0.18, 0.07, 0.75)
+ORPHAN_STATUS_VALUES, ORPHAN_STATUS_WEIGHTS = ("SUCCESS", "FAILED", "PENDING"), (0.65, 0.25, 0.10)
+EVENT_TYPE_VALUES, EVENT_TYPE_WEIGHTS = ("payment_attempted", "payment_succeeded", "payment_failed"), (0.45, 0.40, 0.15)
+EVENT_SOURCE_VALUES, EVENT_SOURCE_WEIGHTS = ("web", "mobile", "internal"), (0.55, 0.35, 0.10)
+PROVIDERS = ("stripe", "paypal", "flutterwave")
+AMOUNT_MODE_VALUES = ("usd_symbol", "int_cents", "plain_string", "missing", "empty")
+AMOUNT_MODE_WEIGHTS = (0.45, 0.35, 0.10, 0.07, 0.03)
+AMOUNT_PREFIX_VALUES, AMOUNT_PREFIX_WEIGHTS = ("$", "USD ", "$ "), (0.85, 0.10, 0.05)
+OCTETS = tuple(str(i) for i in range(1, 255))  # pre-stringified IPv4 octets 1-254
 
 # ----------------------------- helpers -----------------------------
 
@@ -46,7 +68,7 @@ def money_cents_from_total(total_cents: int) -> int:
         return random.choice([0, -total_cents, -500])
     return total_cents
 
-def format_amount_messy(total_cents: int):
+def format_amount_messy(total_cents: int, mode: str, prefix: str):
     """
     Return amount in one of:
       - "$10.00" (string)
@@ -54,15 +76,10 @@ def format_amount_messy(total_cents: int):
       - "10.00" (string without symbol)
       - None (missing)
       - "" (empty)
-    """
-    mode = rand_choice_weighted([
-        ("usd_symbol", 0.45),
-        ("int_cents", 0.35),
-        ("plain_string", 0.10),
-        ("missing", 0.07),
-        ("empty", 0.03),
-    ])
 
+    mode and prefix are drawn in bulk by the caller from AMOUNT_MODE_* / AMOUNT_PREFIX_*;
+    prefix is only used for "usd_symbol".
+    """
     if mode == "missing":
         return None
     if mode == "empty":
@@ -80,8 +97,7 @@ def format_amount_messy(total_cents: int):
 
     # "$" format
     s = f"{dollars:,.2f}" if random.random() < 0.35 else f"{dollars:.2f}"
-    # sometimes space or weird prefix
-    prefix = rand_choice_weighted([("$", 0.85), ("USD ", 0.10), ("$ ", 0.05)])
+    # prefix is sometimes a space or weird variant
     return f"{prefix}{s}"
 
 def random_email():
@@ -89,12 +105,26 @@ def random_email():
     dom = random.choice(["gmail.com", "yahoo.com", "outlook.com", "quickcart.test", "example.com"])
     return f"{user}@{dom}"
 
+def rand_hex(n: int) -> str:
+    """n random hex characters (n must be even)."""
+    return os.urandom(n // 2).hex()
+
 def provider_ref():
-    return "prov_" + uuid4().hex[:18]
+    return "prov_" + rand_hex(18)
 
 def sql_escape(s: str) -> str:
     return s.replace("'", "''")
 
+SQL_BATCH = 1000  # rows per multi-row INSERT statement
+
+def write_insert_batches(f, insert_prefix: str, value_rows):
+    """Write value tuples as multi-row INSERTs of SQL_BATCH rows each (f is a binary file)."""
+    prefix = f"{insert_prefix} VALUES\n".encode("ascii")
+    for i in range(0, len(value_rows), SQL_BATCH):
+        f.write(prefix)
+        f.write(",\n".join(value_rows[i:i + SQL_BATCH]).encode("ascii"))
+        f.write(b";\n")
+
 # ----------------------------- generation -----------------------------
 
 def generate(args):
@@ -105,13 +135,21 @@ def generate(args):
 
     start_dt = datetime.now(UTC) - timedelta(days=args.days)
     end_dt = datetime.now(UTC)
+    span_seconds = int((end_dt - start_dt).total_seconds())
+
+    # Local aliases for names called per row in the loops below (LOAD_FAST vs global lookups)
+    _rand = random.random
+    _randint = random.randint
+    _choice = random.choice
+    _timedelta = timedelta
+    _iso = iso
+    _rand_hex = rand_hex
 
     # Core IDs
     order_ids = []
     order_rows = []
     payment_rows = []
     bank_rows = []
-    log_events = []
 
     # For linking + anomalies
     payment_ids_by_order = {}
@@ -119,22 +157,22 @@ def generate(args):
 
     # Orders
     for i in range(args.orders):
-        oid = f"ord_{uuid4().hex[:16]}"
+        oid = f"ord_{_rand_hex(16)}"
         order_ids.append(oid)
 
-        created_at = start_dt + timedelta(seconds=random.randint(0, int((end_dt - start_dt).total_seconds())))
-        customer_id = f"cus_{uuid4().hex[:12]}"
+        created_at = start_dt + _timedelta(seconds=_randint(0, span_seconds))
+        customer_id = f"cus_{_rand_hex(12)}"
         email = random_email()
 
         # cart total in cents
-        subtotal = random.randint(500, 25000)     # $5 to $250
-        shipping = random.choice([0, 300, 500, 800, 1200])
-        tax = int(subtotal * random.choice([0.0, 0.03, 0.05, 0.075, 0.1]))
+        subtotal = _randint(500, 25000)     # $5 to $250
+        shipping = _choice([0, 300, 500, 800, 1200])
+        tax = int(subtotal * _choice([0.0, 0.03, 0.05, 0.075, 0.1]))
         total_cents = subtotal + shipping + tax
 
-        is_test = 1 if (random.random() < args.test_rate) else 0
+        is_test = 1 if (_rand() < args.test_rate) else 0
         # some "test" is not obvious: use emails/domain flag + explicit flag
-        if random.random() < 0.35 and is_test == 1:
+        if _rand() < 0.35 and is_test == 1:
             email = f"test_{email}"
 
         order_rows.append({
@@ -144,34 +182,39 @@ def generate(args):
             "order_total_cents": total_cents,
             "currency": "USD",
             "is_test": is_test,
-            "created_at": iso(created_at),
+            "created_at": _iso(created_at),
+            "created_dt": created_at,  # native datetimes ride along so later passes never strptime
         })
 
+    order_by_id = {r["order_id"]: r for r in order_rows}
+
     # Payments (attempts)
-    for oid in order_ids:
-        # attempts: most have 1, some have 2-4 retries
-        attempts = rand_choice_weighted([(1, 0.72), (2, 0.20), (3, 0.06), (4, 0.02)])
+    # attempts: most have 1, some have 2-4 retries
+    attempts_per_order = random.choices(ATTEMPT_VALUES, ATTEMPT_WEIGHTS, k=len(order_ids))
+    n_attempts = sum(attempts_per_order)
+    attempt_statuses = iter(random.choices(PAYMENT_STATUS_VALUES, PAYMENT_STATUS_WEIGHTS, k=n_attempts))
+    attempt_providers = iter(random.choices(PROVIDERS, k=n_attempts))
+
+    for oid, attempts in zip(order_ids, attempts_per_order):
         payment_ids_by_order[oid] = []
 
-        order_total = next(r["order_total_cents"] for r in order_rows if r["order_id"] == oid)
-        created_at = datetime.strptime(next(r["created_at"] for r in order_rows if r["order_id"] == oid), "%Y-%m-%dT%H:%M:%SZ")
+        order = order_by_id[oid]
+        order_total = order["order_total_cents"]
+        created_at = order["created_dt"]
+        had_success = False  # any earlier attempt for this order succeeded
 
         for a in range(attempts):
-            pid = f"pay_{uuid4().hex[:16]}"
+            pid = f"pay_{_rand_hex(16)}"
             payment_ids_by_order[oid].append(pid)
             all_payment_ids.append(pid)
 
-            attempted_at = created_at + timedelta(minutes=random.randint(1, 240), seconds=random.randint(0, 59))
+            attempted_at = created_at + _timedelta(minutes=_randint(1, 240), seconds=_randint(0, 59))
 
             # status distribution
-            status = rand_choice_weighted([
-                ("FAILED", 0.18),
-                ("PENDING", 0.07),
-                ("SUCCESS", 0.75),
-            ])
+            status = next(attempt_statuses)
 
             # if earlier attempt succeeded, later attempts should often be failed/duplicate noise
-            if a > 0 and any(p.get("status") == "SUCCESS" for p in payment_rows if p.get("order_id") == oid):
+            if a > 0 and had_success:
                 status = rand_choice_weighted([("FAILED", 0.70), ("SUCCESS", 0.20), ("PENDING", 0.10)])
 
             amount_cents = order_total
@@ -180,32 +223,36 @@ def generate(args):
                 "payment_id": pid,
                 "order_id": oid,
                 "attempt_no": a + 1,
-                "provider": random.choice(["stripe", "paypal", "flutterwave"]),
+                "provider": next(attempt_providers),
                 "provider_ref": provider_ref(),
                 "status": status,
                 "amount_cents": amount_cents,
-                "attempted_at": iso(attempted_at),
+                "attempted_at": _iso(attempted_at),
+                "attempted_dt": attempted_at,
             })
+            had_success = had_success or status == "SUCCESS"
 
     # Orphan payments (payments that exist without orders)
     orphan_count = int(args.orphan_payment_rate * len(payment_rows))
-    for _ in range(orphan_count):
-        pid = f"pay_{uuid4().hex[:16]}"
+    orphan_statuses = random.choices(ORPHAN_STATUS_VALUES, ORPHAN_STATUS_WEIGHTS, k=orphan_count)
+    orphan_providers = random.choices(PROVIDERS, k=orphan_count)
+    for status, provider in zip(orphan_statuses, orphan_providers):
+        pid = f"pay_{_rand_hex(16)}"
         all_payment_ids.append(pid)
 
-        attempted_at = start_dt + timedelta(seconds=random.randint(0, int((end_dt - start_dt).total_seconds())))
-        amount_cents = random.randint(500, 30000)
-        status = rand_choice_weighted([("SUCCESS", 0.65), ("FAILED", 0.25), ("PENDING", 0.10)])
+        attempted_at = start_dt + _timedelta(seconds=_randint(0, span_seconds))
+        amount_cents = _randint(500, 30000)
 
         payment_rows.append({
             "payment_id": pid,
             "order_id": None,
             "attempt_no": 1,
-            "provider": random.choice(["stripe", "paypal", "flutterwave"]),
+            "provider": provider,
             "provider_ref": provider_ref(),
             "status": status,
             "amount_cents": amount_cents,
-            "attempted_at": iso(attempted_at),
+            "attempted_at": _iso(attempted_at),
+            "attempted_dt": attempted_at,
         })
 
     # Bank settlements (authoritative money-in)
@@ -215,54 +262,65 @@ def generate(args):
     bank_sample = random.sample(success_payments, sample_size)
 
     for p in bank_sample:
-        settled_at = datetime.strptime(p["attempted_at"], "%Y-%m-%dT%H:%M:%SZ") + timedelta(hours=random.randint(1, 72))
-        settle_id = f"set_{uuid4().hex[:16]}"
+        settled_at = p["attempted_dt"] + _timedelta(hours=_randint(1, 72))
+        settle_id = f"set_{_rand_hex(16)}"
 
         # sometimes bank settles partial or slightly off (fees, rounding, weirdness)
         amt = p["amount_cents"]
-        if random.random() < args.partial_settlement_rate:
-            amt = int(amt * random.choice([0.5, 0.8, 0.9]))
+        if _rand() < args.partial_settlement_rate:
+            amt = int(amt * _choice([0.5, 0.8, 0.9]))
 
         bank_rows.append({
             "settlement_id": settle_id,
-            "payment_id": p["payment_id"] if random.random() > args.bank_missing_payment_id_rate else None,
-            "provider_ref": p["provider_ref"] if random.random() > args.bank_missing_provider_ref_rate else None,
+            "payment_id": p["payment_id"] if _rand() > args.bank_missing_payment_id_rate else None,
+            "provider_ref": p["provider_ref"] if _rand() > args.bank_missing_provider_ref_rate else None,
             "status": "SETTLED",
             "settled_amount_cents": amt,
             "currency": "USD",
-            "settled_at": iso(settled_at),
+            "settled_at": _iso(settled_at),
         })
 
         # duplicates in bank statement
-        if random.random() < args.bank_duplicate_rate:
+        if _rand() < args.bank_duplicate_rate:
             dup = dict(bank_rows[-1])
-            dup["settlement_id"] = f"set_{uuid4().hex[:16]}"
+            dup["settlement_id"] = f"set_{_rand_hex(16)}"
             bank_rows.append(dup)
 
     # Raw JSON logs (nested + messy)
-    # Create log events from payments, plus noise
-    for p in payment_rows:
-        event_time = datetime.strptime(p["attempted_at"], "%Y-%m-%dT%H:%M:%SZ")
-        amount_field = format_amount_messy(p["amount_cents"])
+    # Create log events from payments, plus noise; the final count is known up front,
+    # so the list is preallocated and filled by index
+    noise_events = int(args.log_noise_rate * len(payment_rows))
+    log_events = [None] * (len(payment_rows) + noise_events)
+    idx = 0
+
+    event_types = random.choices(EVENT_TYPE_VALUES, EVENT_TYPE_WEIGHTS, k=len(payment_rows))
+    event_sources = random.choices(EVENT_SOURCE_VALUES, EVENT_SOURCE_WEIGHTS, k=len(payment_rows))
+    amount_modes = random.choices(AMOUNT_MODE_VALUES, AMOUNT_MODE_WEIGHTS, k=len(payment_rows))
+    amount_prefixes = random.choices(AMOUNT_PREFIX_VALUES, AMOUNT_PREFIX_WEIGHTS, k=len(payment_rows))
+    for p, event_type, event_source, amount_mode, amount_prefix in zip(
+        payment_rows, event_types, event_sources, amount_modes, amount_prefixes
+    ):
+        event_time = p["attempted_dt"]
+        amount_field = format_amount_messy(p["amount_cents"], amount_mode, amount_prefix)
 
         # some logs lack order_id even for valid payments
         order_id = p["order_id"]
-        if random.random() < args.log_missing_order_id_rate:
+        if _rand() < args.log_missing_order_id_rate:
             order_id = None
 
         # test flags appear in different ways
         flags = []
-        if random.random() < 0.10:
+        if _rand() < 0.10:
             flags.append("replayed")
-        if random.random() < args.test_rate:
+        if _rand() < args.test_rate:
             flags.append("test")
 
-        log_events.append({
+        log_events[idx] = {
             "event": {
-                "id": f"evt_{uuid4().hex[:18]}",
-                "type": rand_choice_weighted([("payment_attempted", 0.45), ("payment_succeeded", 0.40), ("payment_failed", 0.15)]),
-                "ts": iso(event_time),
-                "source": rand_choice_weighted([("web", 0.55), ("mobile", 0.35), ("internal", 0.10)]),
+                "id": f"evt_{_rand_hex(18)}",
+                "type": event_type,
+                "ts": _iso(event_time),
+                "source": event_source,
             },
             "entity": {
                 "order": {"id": order_id},
@@ -275,63 +333,82 @@ def generate(args):
                 "status": p["status"],
                 "flags": flags if flags else None,
                 "metadata": {
-                    "ip": ".".join(str(random.randint(1, 254)) for _ in range(4)),
-                    "user_agent": random.choice(["Chrome", "Safari", "Firefox", "Edge", "MobileApp"]),
+                    "ip": f"{_choice(OCTETS)}.{_choice(OCTETS)}.{_choice(OCTETS)}.{_choice(OCTETS)}",
+                    "user_agent": _choice(["Chrome", "Safari", "Firefox", "Edge", "MobileApp"]),
                 }
             }
-        })
+        }
+        idx += 1
 
     # Extra pure-noise events
-    noise_events = int(args.log_noise_rate * len(log_events))
     for _ in range(noise_events):
-        t = start_dt + timedelta(seconds=random.randint(0, int((end_dt - start_dt).total_seconds())))
-        log_events.append({
-            "event": {"id": f"evt_{uuid4().hex[:18]}", "type": "heartbeat", "ts": iso(t), "source": "internal"},
+        t = start_dt + _timedelta(seconds=_randint(0, span_seconds))
+        log_events[idx] = {
+            "event": {"id": f"evt_{_rand_hex(18)}", "type": "heartbeat", "ts": _iso(t), "source": "internal"},
             "entity": {"order": {"id": None}, "payment": {"id": None}, "customer": {"email": None}},
             "payload": {"Amount": None, "currency": "USD", "status": None, "flags": ["noise"]}
-        })
+        }
+        idx += 1
 
     random.shuffle(log_events)
 
     # ----------------------------- write files -----------------------------
 
+    # Output files are binary streams behind large buffers to keep syscalls down;
+    # the SQL seeds are pure ASCII, batched into multi-row INSERTs.
+    buf_size = 1 << 20
+
     # JSONL logs
     raw_path = os.path.join(outdir, "raw_data.jsonl")
-    with open(raw_path, "w", encoding="utf-8") as f:
+    with open(raw_path, "wb", buffering=buf_size) as f:
+        nl = b"\n"
         for ev in log_events:
-            f.write(json.dumps(ev) + "\n")
+            f.write(json_dumps_bytes(ev) + nl)
 
     # SQL seed files
     orders_sql = os.path.join(outdir, "seed_orders.sql")
     payments_sql = os.path.join(outdir, "seed_payments.sql")
     bank_sql = os.path.join(outdir, "seed_bank_settlements.sql")
 
-    with open(orders_sql, "w", encoding="utf-8") as f:
-        f.write("-- seed_orders.sql\n")
-        for r in order_rows:
-            f.write(
-                "INSERT INTO orders (order_id, customer_id, customer_email, order_total_cents, currency, is_test, created_at) VALUES "
-                f"('{r['order_id']}', '{r['customer_id']}', '{sql_escape(r['customer_email'])}', {r['order_total_cents']}, '{r['currency']}', {r['is_test']}, '{r['created_at']}');\n"
-            )
-
-    with open(payments_sql, "w", encoding="utf-8") as f:
-        f.write("-- seed_payments.sql\n")
+    with open(orders_sql, "wb", buffering=buf_size) as f:
+        f.write(b"-- seed_orders.sql\n")
+        write_insert_batches(
+            f,
+            "INSERT INTO orders (order_id, customer_id, customer_email, order_total_cents, currency, is_test, created_at)",
+            [
+                f"('{r['order_id']}', '{r['customer_id']}', '{sql_escape(r['customer_email'])}', {r['order_total_cents']}, '{r['currency']}', {r['is_test']}, '{r['created_at']}')"
+                for r in order_rows
+            ],
+        )
+
+    with open(payments_sql, "wb", buffering=buf_size) as f:
+        f.write(b"-- seed_payments.sql\n")
+        values = []
         for r in payment_rows:
             order_id_sql = "NULL" if r["order_id"] is None else f"'{r['order_id']}'"
-            f.write(
-                "INSERT INTO payments (payment_id, order_id, attempt_no, provider, provider_ref, status, amount_cents, attempted_at) VALUES "
-                f"('{r['payment_id']}', {order_id_sql}, {r['attempt_no']}, '{r['provider']}', '{r['provider_ref']}', '{r['status']}', {r['amount_cents']}, '{r['attempted_at']}');\n"
+            values.append(
+                f"('{r['payment_id']}', {order_id_sql}, {r['attempt_no']}, '{r['provider']}', '{r['provider_ref']}', '{r['status']}', {r['amount_cents']}, '{r['attempted_at']}')"
             )
-
-    with open(bank_sql, "w", encoding="utf-8") as f:
-        f.write("-- seed_bank_settlements.sql\n")
+        write_insert_batches(
+            f,
+            "INSERT INTO payments (payment_id, order_id, attempt_no, provider, provider_ref, status, amount_cents, attempted_at)",
+            values,
+        )
+
+    with open(bank_sql, "wb", buffering=buf_size) as f:
+        f.write(b"-- seed_bank_settlements.sql\n")
+        values = []
         for r in bank_rows:
             pid_sql = "NULL" if r["payment_id"] is None else f"'{r['payment_id']}'"
             pref_sql = "NULL" if r["provider_ref"] is None else f"'{r['provider_ref']}'"
-            f.write(
-                "INSERT INTO bank_settlements (settlement_id, payment_id, provider_ref, status, settled_amount_cents, currency, settled_at) VALUES "
-                f"('{r['settlement_id']}', {pid_sql}, {pref_sql}, '{r['status']}', {r['settled_amount_cents']}, '{r['currency']}', '{r['settled_at']}');\n"
+            values.append(
+                f"('{r['settlement_id']}', {pid_sql}, {pref_sql}, '{r['status']}', {r['settled_amount_cents']}, '{r['currency']}', '{r['settled_at']}')"
             )
+        write_insert_batches(
+            f,
+            "INSERT INTO bank_settlements (settlement_id, payment_id, provider_ref, status, settled_amount_cents, currency, settled_at)",
+            values,
+        )
 
     # Summary
     print("✅ Generated:")